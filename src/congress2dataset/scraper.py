@@ -3,71 +3,153 @@ import os
 from argparse import ArgumentParser
 
 from playwright.async_api import async_playwright
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne
+from pymongo.errors import OperationFailure
+
+_CLIENT: MongoClient | None = None
+
+
+def get_client() -> MongoClient:
+    # MongoClient is thread-safe and pools connections; share one per process
+    global _CLIENT
+    if _CLIENT is None:
+        _CLIENT = MongoClient(maxPoolSize=32)
+    return _CLIENT
 
 
 async def scrape(
-    congress: int, type: str, start: int, end: int, sleep: int, timeout: int = 60
+    congress: int,
+    type: str,
+    start: int,
+    end: int,
+    sleep: int,
+    timeout: int = 60,
+    workers: int = 1,
+    batch_size: int = 10,
+    screenshots: bool = False,
 ):
-    os.makedirs("./screenshots", exist_ok=True)
+    if screenshots:
+        os.makedirs("./screenshots", exist_ok=True)
 
-    client = MongoClient()
-    db = client.federal
+    db = get_client().federal
     collection = db.bills
-    async with async_playwright() as p:
-        browser = await p.firefox.launch(headless=False)
-        page = await browser.new_page()
-
-        for i in range(start, end + 1):
-            # check if the bill is already in the database
-            if collection.find_one({"congress": congress, "type": type, "number": i}):
-                print(f"Bill {congress}-{type}-{i} already in the database")
-                continue
-
-            # load the page
-            # https://www.congress.gov/bill/117th-congress/house-bill/1/all-info?allSummaries=show
-            url = f"https://www.congress.gov/bill/{congress}th-congress/{type}/{i}/all-info/?allSummaries=show"
-            print(f"Loading {url}")
-            await page.goto(url, timeout=timeout * 1000)
-            await page.wait_for_load_state("domcontentloaded")
-            print(f"Loaded {page.url}")
-
-            # validate title
-            title = await page.title()
-            if "Library of Congress" not in title:
-                raise ValueError(f"Invalid page title: {title}")
-
-            # get description of page
-            website_description = await page.query_selector('meta[name="description"]')
-            if website_description is None:
-                description = ""
-            else:
-                description = await website_description.evaluate(
-                    "(element) => element.content"
-                )
-
-            # take a screenshot
+    # every lookup filters on (congress, type, number), so make it an index seek
+    index = [("congress", 1), ("type", 1), ("number", 1)]
+    try:
+        collection.create_index(index, unique=True)
+    except OperationFailure as e:
+        # bills stored twice by older runs (or an existing non-unique index) block
+        # the unique index; fall back to a plain one so scraping still works
+        print(f"Could not create a unique bill index ({e}), using a non-unique one")
+        collection.create_index(index)
+    # one query up front instead of a round-trip per bill
+    existing = set(collection.distinct("number", {"congress": congress, "type": type}))
+
+    # buffer scraped bills and write them in batches to amortize the round-trip;
+    # up to batch_size fetched pages live only in memory until the next flush
+    pending: list[UpdateOne] = []
+
+    async def flush():
+        if not pending:
+            return
+        batch = pending[:]
+        pending.clear()
+        # upsert with $setOnInsert so re-running over a saved bill is a no-op;
+        # the write blocks, so keep it off the event loop driving the pages
+        try:
+            await asyncio.to_thread(collection.bulk_write, batch, ordered=False)
+        except BaseException:
+            # requeue on failure or cancellation so the final flush retries the
+            # batch; the upserts are idempotent if part of it already landed
+            pending[:0] = batch
+            raise
+        print(f"Saved {len(batch)} bills to the database")
+
+    # https://www.congress.gov/bill/117th-congress/house-bill/1/all-info?allSummaries=show
+    url_prefix = f"https://www.congress.gov/bill/{congress}th-congress/{type}/"
+    url_suffix = "/all-info/?allSummaries=show"
+
+    async def fetch_one(page, i: int):
+        # load the page
+        url = f"{url_prefix}{i}{url_suffix}"
+        print(f"Loading {url}")
+        await page.goto(url, timeout=timeout * 1000)
+        await page.wait_for_load_state("domcontentloaded")
+        print(f"Loaded {page.url}")
+
+        # validate title
+        title = await page.title()
+        if "Library of Congress" not in title:
+            raise ValueError(f"Invalid page title: {title}")
+
+        # get description of page
+        website_description = await page.query_selector('meta[name="description"]')
+        if website_description is None:
+            description = ""
+        else:
+            description = await website_description.evaluate(
+                "(element) => element.content"
+            )
+
+        # take a screenshot; full-page JPEG encoding is slow, so only on request
+        if screenshots:
             await page.screenshot(path=f"./screenshots/{congress}-{type}-{i}.jpg")
 
-            # store the html content in MongoDB
-            html = await page.content()
-            collection.insert_one(
-                {
-                    "congress": congress,
-                    "type": type,
-                    "number": i,
-                    "source": {
-                        "url": url,
-                        "title": title,
-                        "html": html,
-                        "description": description,
-                    },
-                }
+        # store the html content in MongoDB
+        html = await page.content()
+        source = {
+            "url": url,
+            "title": title,
+            "html": html,
+            "description": description,
+        }
+        # the upsert fills congress/type/number in from the filter
+        pending.append(
+            UpdateOne(
+                {"congress": congress, "type": type, "number": i},
+                {"$setOnInsert": {"source": source}},
+                upsert=True,
             )
-            print(f"Bill {congress}-{type}-{i} saved HTML to the database")
+        )
+        print(f"Bill {congress}-{type}-{i} queued for the database")
+        if len(pending) >= batch_size:
+            await flush()
+
+    # check which bills are already in the database before starting a browser
+    numbers: asyncio.Queue[int] = asyncio.Queue()
+    for i in range(start, end + 1):
+        if i in existing:
+            print(f"Bill {congress}-{type}-{i} already in the database")
+        else:
+            numbers.put_nowait(i)
+    if numbers.empty():
+        return
+
+    async with async_playwright() as p:
+        browser = await p.firefox.launch(headless=False)
+        context = await browser.new_context()
+
+        async def worker():
+            # each worker drives its own page and sleeps between its own fetches,
+            # so at most `workers` requests are in flight at once
+            page = await context.new_page()
+            try:
+                while not numbers.empty():
+                    await fetch_one(page, numbers.get_nowait())
+                    await asyncio.sleep(sleep)
+            finally:
+                await page.close()
 
-            # sleep for a while
-            await asyncio.sleep(sleep)
+        tasks = [asyncio.create_task(worker()) for _ in range(max(workers, 1))]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            # gather leaves the other workers running when one raises; stop them
+            # before the final flush so nothing is queued after it
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await flush()
 
         await browser.close()
 
@@ -79,6 +161,20 @@ if __name__ == "__main__":
     parser.add_argument("--start", type=int, required=False, default=1)
     parser.add_argument("--end", type=int, required=False, default=1)
     parser.add_argument("--sleep", type=int, required=False, default=10)
+    parser.add_argument("--workers", type=int, required=False, default=1)
+    parser.add_argument("--batch-size", type=int, required=False, default=10)
+    parser.add_argument("--screenshots", action="store_true")
 
     args = parser.parse_args()
-    asyncio.run(scrape(args.congress, args.type, args.start, args.end, args.sleep))
+    asyncio.run(
+        scrape(
+            args.congress,
+            args.type,
+            args.start,
+            args.end,
+            args.sleep,
+            workers=args.workers,
+            batch_size=args.batch_size,
+            screenshots=args.screenshots,
+        )
+    )
@@ -0,0 +1,192 @@
+import asyncio
+
+import pytest
+from pymongo.errors import AutoReconnect, DuplicateKeyError
+
+from congress2dataset import scraper
+
+
+class FakeCollection:
+    def __init__(self, stored=(), duplicates=False, failures=0):
+        self.stored = set(stored)
+        self.duplicates = duplicates
+        self.failures = failures
+        self.indexes = []
+        self.written = []
+
+    def create_index(self, keys, unique=False):
+        if unique and self.duplicates:
+            raise DuplicateKeyError("E11000 duplicate key error")
+        self.indexes.append((keys, unique))
+
+    def distinct(self, key, filter):
+        return list(self.stored)
+
+    def bulk_write(self, ops, ordered=True):
+        if self.failures:
+            self.failures -= 1
+            raise AutoReconnect("connection reset")
+        self.written.append([op._filter["number"] for op in ops])
+
+
+class FakePage:
+    def __init__(self, browser):
+        self.browser = browser
+        self.url = ""
+        self.closed = False
+
+    async def goto(self, url, timeout):
+        self.url = url
+        await asyncio.sleep(0)
+
+    async def wait_for_load_state(self, state):
+        await asyncio.sleep(0)
+
+    async def title(self):
+        if self.number in self.browser.bad:
+            return "Page Not Found"
+        return "Congress.gov | Library of Congress"
+
+    async def query_selector(self, selector):
+        return None
+
+    async def content(self):
+        self.browser.fetched.append(self.number)
+        return f"<html>{self.number}</html>"
+
+    async def close(self):
+        self.closed = True
+
+    @property
+    def number(self):
+        # .../house-bill/<number>/all-info/?allSummaries=show
+        return int(self.url.split("/")[-3])
+
+
+class FakeBrowser:
+    def __init__(self, bad):
+        self.bad = set(bad)
+        self.fetched = []
+        self.pages = []
+        self.launches = 0
+
+    async def new_context(self):
+        return self
+
+    async def new_page(self):
+        page = FakePage(self)
+        self.pages.append(page)
+        return page
+
+    async def close(self):
+        pass
+
+
+class FakeFirefox:
+    def __init__(self, browser):
+        self.browser = browser
+
+    async def launch(self, headless):
+        self.browser.launches += 1
+        return self.browser
+
+
+class FakePlaywright:
+    def __init__(self, browser):
+        self.firefox = FakeFirefox(browser)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+@pytest.fixture
+def fake_env(monkeypatch):
+    def setup(stored=(), bad=(), duplicates=False, failures=0):
+        collection = FakeCollection(stored, duplicates, failures)
+        browser = FakeBrowser(bad)
+
+        class FakeClient:
+            federal = type("FakeDB", (), {"bills": collection})
+
+        monkeypatch.setattr(scraper, "get_client", lambda: FakeClient)
+        monkeypatch.setattr(
+            scraper, "async_playwright", lambda: FakePlaywright(browser)
+        )
+        return collection, browser
+
+    return setup
+
+
+def run(**kwargs):
+    kwargs = {"congress": 117, "type": "house-bill", "sleep": 0, **kwargs}
+    asyncio.run(scraper.scrape(**kwargs))
+
+
+def test_every_missing_bill_written_once_with_workers(fake_env):
+    collection, browser = fake_env(stored={2, 5})
+
+    run(start=1, end=10, workers=3, batch_size=3)
+
+    written = [n for batch in collection.written for n in batch]
+    assert sorted(written) == [1, 3, 4, 6, 7, 8, 9, 10]
+    assert all(page.closed for page in browser.pages)
+
+
+def test_final_partial_batch_flushed(fake_env):
+    collection, _ = fake_env()
+
+    run(start=1, end=7, batch_size=3)
+
+    assert [len(batch) for batch in collection.written] == [3, 3, 1]
+
+
+def test_error_stops_all_workers_without_dropping_pages(fake_env):
+    collection, browser = fake_env(bad={3})
+
+    async def main():
+        with pytest.raises(ValueError):
+            await scraper.scrape(117, "house-bill", 1, 20, 0, workers=3, batch_size=100)
+        fetched = list(browser.fetched)
+        # any worker left running would keep fetching after scrape() returns
+        for _ in range(10):
+            await asyncio.sleep(0)
+        return fetched
+
+    fetched = asyncio.run(main())
+
+    assert browser.fetched == fetched
+    assert len(fetched) < 19
+    written = [n for batch in collection.written for n in batch]
+    assert sorted(written) == sorted(fetched)
+    assert all(page.closed for page in browser.pages)
+
+
+def test_failed_write_retried_by_final_flush(fake_env):
+    collection, _ = fake_env(failures=1)
+
+    with pytest.raises(AutoReconnect):
+        run(start=1, end=3, batch_size=2)
+
+    assert collection.written == [[1, 2]]
+
+
+def test_no_browser_when_everything_stored(fake_env):
+    collection, browser = fake_env(stored={1, 2, 3})
+
+    run(start=1, end=3)
+
+    assert browser.launches == 0
+    assert collection.written == []
+
+
+def test_duplicate_bills_fall_back_to_plain_index(fake_env):
+    collection, _ = fake_env(stored={1}, duplicates=True)
+
+    run(start=1, end=1)
+
+    assert collection.indexes == [
+        ([("congress", 1), ("type", 1), ("number", 1)], False)
+    ]